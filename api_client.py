@@ -0,0 +1,383 @@
+import gzip
+import io
+import itertools
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from metrics import LatencyStore
+from prediction_cache import PREDICTION_CACHE_SIZE, PredictionCache
+
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "60"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.5"))
+HTTP_BALANCER = os.environ.get("HTTP_BALANCER", "round_robin")
+HTTP_ACCEPT_ENCODING = os.environ.get("HTTP_ACCEPT_ENCODING", ACCEPT_ENCODING)
+HTTP_COMPRESS_MIN_BYTES = int(os.environ.get("HTTP_COMPRESS_MIN_BYTES", "0"))
+REPLICA_EJECT_AFTER = int(os.environ.get("REPLICA_EJECT_AFTER", "3"))
+REPLICA_EJECT_SECONDS = float(os.environ.get("REPLICA_EJECT_SECONDS", "30"))
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "15"))
+BREAKER_PROBE_PATH = os.environ.get("BREAKER_PROBE_PATH", "/")
+WARMUP_PATH = os.environ.get("WARMUP_PATH", "/")
+WARMUP_CONNECTIONS = int(os.environ.get("WARMUP_CONNECTIONS", "2"))
+WARMUP_COLD_SECONDS = float(os.environ.get("WARMUP_COLD_SECONDS", "2"))
+KEEP_WARM_INTERVAL = float(os.environ.get("KEEP_WARM_INTERVAL", "0"))
+HTTP_WIRE_FORMAT = os.environ.get("HTTP_WIRE_FORMAT", "arrow")
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def build_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+    """Creates a keep-alive session with a pooled, retrying adapter.
+
+    Responses are requested in every content encoding urllib3 can decode here
+    (gzip and deflate, plus br and zstd when brotli and zstandard are installed)
+    unless HTTP_ACCEPT_ENCODING narrows it.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update({"Connection": "keep-alive", "Accept-Encoding": HTTP_ACCEPT_ENCODING})
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Replica:
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+
+class ReplicaPool:
+    """Picks a backend replica per call and ejects replicas that keep failing.
+
+    `strategy` is `round_robin` or `least_outstanding`. A replica with
+    `eject_after` consecutive failures is skipped for `eject_seconds`; if every
+    replica is ejected they are all tried again rather than failing outright.
+    """
+
+    def __init__(self, urls, strategy=HTTP_BALANCER, eject_after=REPLICA_EJECT_AFTER, eject_seconds=REPLICA_EJECT_SECONDS):
+        if strategy not in ("round_robin", "least_outstanding"):
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+        self.replicas = [Replica(url.rstrip("/")) for url in urls]
+        if not self.replicas:
+            raise ValueError("At least one API URL is required")
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude=()):
+        with self._lock:
+            now = time.monotonic()
+            candidates = [r for r in self.replicas if r not in exclude] or self.replicas
+            candidates = [r for r in candidates if r.ejected_until <= now] or candidates
+            offset = next(self._turn)
+            ordered = candidates[offset % len(candidates):] + candidates[:offset % len(candidates)]
+            replica = min(ordered, key=lambda r: r.outstanding) if self.strategy == "least_outstanding" else ordered[0]
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica, healthy):
+        with self._lock:
+            replica.outstanding -= 1
+            if healthy:
+                replica.failures = 0
+                return
+            replica.failures += 1
+            if replica.failures >= self.eject_after:
+                replica.failures = 0
+                replica.ejected_until = time.monotonic() + self.eject_seconds
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return pd.DataFrame([{
+                "replica": r.url,
+                "outstanding": r.outstanding,
+                "failures": r.failures,
+                "ejected_for_s": max(r.ejected_until - now, 0.0),
+            } for r in self.replicas])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after consecutive backend failures and probes for recovery in the background.
+
+    After `failures` failed calls in a row the breaker opens and every call
+    raises CircuitOpenError. A daemon thread then calls `probe` every
+    `reset_seconds` (the half-open state) and closes the breaker once it
+    succeeds, so no user request waits on a dead backend.
+    """
+
+    def __init__(self, probe, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.probe = probe
+        self.failure_threshold = failures
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def check(self):
+        if self.state != "closed":
+            raise CircuitOpenError(f"Circuit breaker is {self.state.replace('_', '-')}; failing fast.")
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "closed" and self.failures >= self.failure_threshold:
+                self.state = "open"
+                threading.Thread(target=self._probe_until_healthy, name="breaker-probe", daemon=True).start()
+
+    def _probe_until_healthy(self):
+        while True:
+            time.sleep(self.reset_seconds)
+            with self._lock:
+                self.state = "half_open"
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            with self._lock:
+                if healthy:
+                    self.state = "closed"
+                    self.failures = 0
+                    return
+                self.state = "open"
+
+
+def is_arrow(response):
+    return response.headers.get("Content-Type", "").split(";")[0].strip().lower() == ARROW_STREAM
+
+
+class BodyReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            self._buffer = next(self._chunks, None)
+            if self._buffer is None:
+                self._buffer = b""
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n], self._buffer = self._buffer[:n], self._buffer[n:]
+        return n
+
+
+def split_urls(urls):
+    """Accepts one URL, a comma/whitespace separated string of URLs, or a list."""
+    return [u for u in re.split(r"[,\s]+", urls) if u] if isinstance(urls, str) else list(urls)
+
+
+class ApiClient:
+    """Thin wrapper that sends every backend call through one pooled session and times it.
+
+    `base_url` may list several replicas; calls are balanced across them and a
+    GET that cannot connect is retried once on another replica. With
+    `wire_format` "arrow", table-shaped endpoints are asked for Arrow IPC
+    streams first and JSON is the fallback. Raw `data` bodies of at least
+    `compress_min_bytes` are sent gzipped; 0 never compresses.
+    """
+
+    def __init__(self, base_url, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), metrics=None, strategy=HTTP_BALANCER,
+                 prediction_cache_size=PREDICTION_CACHE_SIZE, wire_format=HTTP_WIRE_FORMAT,
+                 compress_min_bytes=HTTP_COMPRESS_MIN_BYTES):
+        if wire_format not in ("arrow", "json"):
+            raise ValueError(f"Unknown wire format: {wire_format}")
+        self.wire_format = wire_format
+        self.compress_min_bytes = compress_min_bytes
+        self.replicas = ReplicaPool(split_urls(base_url), strategy)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.metrics = metrics or LatencyStore()
+        self.session = build_session(pool_size, retries, backoff)
+        self.breaker = CircuitBreaker(self._probe)
+        self.prediction_cache = PredictionCache(prediction_cache_size) if prediction_cache_size else None
+
+    def _probe(self):
+        replica = self.replicas.acquire()
+        try:
+            response = self.session.get(f"{replica.url}{BREAKER_PROBE_PATH}", timeout=self.timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.replicas.release(replica, healthy=False)
+            return False
+        self.replicas.release(replica, healthy=response.status_code < 500)
+        return response.status_code < 500
+
+    def _ping(self, replica):
+        start = time.perf_counter()
+        try:
+            healthy = self.session.get(f"{replica.url}{WARMUP_PATH}", timeout=self.timeout).status_code < 500
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            healthy = False
+        elapsed = time.perf_counter() - start
+        phase = "failed" if not healthy else "cold" if elapsed >= WARMUP_COLD_SECONDS else "warm"
+        self.metrics.observe("warmup", phase, elapsed)
+        return healthy
+
+    def warm_up(self, connections=WARMUP_CONNECTIONS):
+        """Pings every replica over parallel requests so hosts are awake and pooled connections are open.
+
+        Pings slower than WARMUP_COLD_SECONDS are recorded as `cold`, the rest as
+        `warm`, under the `warmup` endpoint of the latency store.
+        """
+        replicas = [r for r in self.replicas.replicas for _ in range(max(1, min(connections, self.pool_size)))]
+        with ThreadPoolExecutor(max_workers=len(replicas), thread_name_prefix="warmup") as pool:
+            return list(pool.map(self._ping, replicas))
+
+    def request(self, method, path, endpoint=None, **kwargs):
+        """Sends one call; metrics are recorded under `endpoint`, by default the path without its query."""
+        self.breaker.check()
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = endpoint or path.split("?")[0]
+        body = kwargs.get("data")
+        body = body.encode() if isinstance(body, str) else body
+        if isinstance(body, bytes):
+            kwargs["data"] = body
+            if self.compress_min_bytes and len(body) >= self.compress_min_bytes:
+                kwargs["data"] = gzip.compress(body)
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Encoding": "gzip"}
+            sizes = len(kwargs["data"]), len(body)
+        attempts = min(2, len(self.replicas.replicas)) if method == "GET" else 1
+        tried = []
+        for attempt in range(attempts):
+            replica = self.replicas.acquire(exclude=tried)
+            tried.append(replica)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, f"{replica.url}{path}", **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.replicas.release(replica, healthy=False)
+                self.metrics.record_request(endpoint, time.perf_counter() - start, error=True)
+                if attempt + 1 < attempts:
+                    continue
+                self.breaker.record(ok=False)
+                raise
+            except Exception:
+                self.replicas.release(replica, healthy=True)
+                self.metrics.record_request(endpoint, time.perf_counter() - start, error=True)
+                raise
+            self.replicas.release(replica, healthy=response.status_code < 500)
+            self.breaker.record(ok=response.status_code < 500)
+            self.metrics.record_request(endpoint, time.perf_counter() - start, response, response.status_code >= 400)
+            if isinstance(body, bytes):
+                self.metrics.record_bytes(endpoint, "request", *sizes)
+            if not kwargs.get("stream"):
+                self.metrics.record_bytes(endpoint, "response", response.raw.tell(), len(response.content))
+            return response
+
+    def decode(self, response, endpoint):
+        """Parses a JSON body, timing the decode under the call's endpoint."""
+        with self.metrics.timer(endpoint, "decode"):
+            return response.json()
+
+    def accept(self, *media_types):
+        """Accept header preferring Arrow IPC when enabled, then `media_types` in order."""
+        types = ([ARROW_STREAM] if self.wire_format == "arrow" else []) + list(media_types)
+        return ", ".join(t if i == 0 else f"{t};q={1 - i / 10:.1f}" for i, t in enumerate(types))
+
+    def iter_body(self, response, endpoint, chunk_size):
+        """Yields the decoded body of a `stream=True` response and records its wire and decoded sizes."""
+        decoded = 0
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                decoded += len(chunk)
+                yield chunk
+        finally:
+            self.metrics.record_bytes(endpoint, "response", response.raw.tell(), decoded)
+
+    def decode_arrow(self, response, endpoint, chunk_size=None):
+        """Reads an Arrow IPC stream body into a DataFrame, timing the decode under the call's endpoint.
+
+        With `chunk_size` the record batches are read off a `stream=True`
+        response as its chunks arrive instead of from the buffered body.
+        """
+        with self.metrics.timer(endpoint, "decode"):
+            if chunk_size is None:
+                return pa.ipc.open_stream(response.content).read_pandas()
+            source = io.BufferedReader(BodyReader(self.iter_body(response, endpoint, chunk_size)))
+            return pa.ipc.open_stream(source).read_pandas()
+
+    def _score(self, transaction, idempotency_key=None):
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        response = self.post("/predict/", json=transaction, headers=headers)
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"Error from API ({response.status_code}): {response.text}", response=response)
+        return self.decode(response, "/predict/")
+
+    def predict(self, transaction, idempotency_key=None):
+        """Scores one transaction via /predict/, served from the prediction cache when it is enabled.
+
+        `idempotency_key` is sent as the Idempotency-Key header so a backend can
+        recognise a resent submission.
+        """
+        if self.prediction_cache is None:
+            return self._score(transaction, idempotency_key)
+        return self.prediction_cache.get_or_score(transaction, lambda: self._score(transaction, idempotency_key))
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class KeepWarm:
+    """Background task that warms the backend at startup and then every `interval` seconds."""
+
+    def __init__(self, client, interval=KEEP_WARM_INTERVAL, connections=WARMUP_CONNECTIONS):
+        self.client = client
+        self.interval = interval
+        self.connections = connections
+        self._stop = threading.Event()
+
+    def _run(self):
+        self.client.warm_up(self.connections)
+        while self.interval and not self._stop.wait(self.interval):
+            self.client.warm_up(self.connections)
+
+    def start(self):
+        threading.Thread(target=self._run, name="keep-warm", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,240 @@
+import bisect
+import csv
+import glob
+import os
+import threading
+import time
+from collections import namedtuple
+import pandas as pd
+
+MERCHANT_KINDS = ("merchant", "merchant_prefix", "merchant_fuzzy")
+AMOUNT_KINDS = ("amount", "amount_range")
+ACTIONS = ("flag", "deny")
+FUZZY_DISTANCE = 1
+RULES_CHECK_INTERVAL = float(os.environ.get("RULES_CHECK_INTERVAL", "5"))
+SECRET_FRAUD_MERCHANT = ["xyz enterprises", "shopify", "uber", "makemytrip", "sitara 5 star", "google play", "walmart", "indian oil"]
+SECRET_FRAUD_AMOUNT = [499999.00, 74567.00, 230000.00, 123456.00, 432121.00]
+
+Verdict = namedtuple("Verdict", ["action", "rules"])
+
+
+class Rule:
+    def __init__(self, rule_id, kind, value, action="flag"):
+        if kind not in MERCHANT_KINDS + AMOUNT_KINDS:
+            raise ValueError(f"Unknown rule kind: {kind}")
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown rule action: {action}")
+        if value is None or not str(value).strip():
+            raise ValueError(f"Rule {rule_id} has no value")
+        self.id = rule_id
+        self.kind = kind
+        self.action = action
+        if kind in MERCHANT_KINDS:
+            self.value = normalize_merchant(value)
+        elif kind == "amount":
+            self.value = round(float(value), 2)
+        else:
+            low, high = (float(v) for v in str(value).split("-", 1))
+            self.value = (min(low, high), max(low, high))
+        self.hits = 0
+
+
+def normalize_merchant(name):
+    """Case-folds and collapses whitespace so 'Uber ' and 'uber' are the same merchant."""
+    return " ".join(str(name).casefold().split())
+
+
+def rule_files(path):
+    return sorted(glob.glob(os.path.join(path, "*.csv"))) if os.path.isdir(path) else [path]
+
+
+class _Trie:
+    def __init__(self):
+        self.root = {}
+
+    def add(self, word, rule):
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, []).append(rule)
+
+    def prefixes_of(self, word):
+        """Rules stored at every prefix of `word`, including the whole word."""
+        node, found = self.root, list(self.root.get(None, []))
+        for ch in word:
+            node = node.get(ch)
+            if node is None:
+                break
+            found.extend(node.get(None, []))
+        return found
+
+    def within(self, word, max_distance):
+        """Rules whose key is within `max_distance` edits of `word` (Levenshtein over the trie)."""
+        found = []
+        first_row = list(range(len(word) + 1))
+
+        def walk(node, ch, previous_row):
+            row = [previous_row[0] + 1]
+            for i in range(1, len(word) + 1):
+                row.append(min(row[i - 1] + 1, previous_row[i] + 1, previous_row[i - 1] + (word[i - 1] != ch)))
+            if row[-1] <= max_distance:
+                found.extend(node.get(None, []))
+            if min(row) <= max_distance:
+                for next_ch, child in node.items():
+                    if next_ch is not None:
+                        walk(child, next_ch, row)
+
+        if first_row[-1] <= max_distance:
+            found.extend(self.root.get(None, []))
+        for ch, child in self.root.items():
+            if ch is not None:
+                walk(child, ch, first_row)
+        return found
+
+
+class _IntervalIndex:
+    def __init__(self, rules):
+        self.rules = sorted(rules, key=lambda r: r.value[0])
+        self.lows = [r.value[0] for r in self.rules]
+        self.max_high = []
+        for rule in self.rules:
+            self.max_high.append(max(rule.value[1], self.max_high[-1] if self.max_high else rule.value[1]))
+
+    def stab(self, x):
+        found = []
+        i = bisect.bisect_right(self.lows, x) - 1
+        while i >= 0 and self.max_high[i] >= x:
+            if self.rules[i].value[1] >= x:
+                found.append(self.rules[i])
+            i -= 1
+        return found
+
+
+class RuleSet:
+    """Compiled pre-screen rules checked before a transaction is sent to the model.
+
+    Merchant rules match exactly (hashed), by prefix (trie) or within
+    `fuzzy_distance` edits (trie walk); amount rules match exactly or by
+    inclusive range (interval index). A `deny` rule blocks the payment without
+    a network call, a `flag` rule sends it as high risk.
+    """
+
+    def __init__(self, rules, fuzzy_distance=FUZZY_DISTANCE):
+        self.rules = list(rules)
+        self.fuzzy_distance = fuzzy_distance
+        self._merchants = {}
+        self._amounts = {}
+        self._prefixes = _Trie()
+        self._fuzzy = _Trie()
+        for rule in self.rules:
+            if rule.kind == "merchant":
+                self._merchants.setdefault(rule.value, []).append(rule)
+            elif rule.kind == "merchant_prefix":
+                self._prefixes.add(rule.value, rule)
+            elif rule.kind == "merchant_fuzzy":
+                self._fuzzy.add(rule.value, rule)
+            elif rule.kind == "amount":
+                self._amounts.setdefault(rule.value, []).append(rule)
+        self._ranges = _IntervalIndex([r for r in self.rules if r.kind == "amount_range"])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def defaults(cls):
+        """The built-in merchant and amount watch lists, as `flag` rules."""
+        rules = [Rule(f"merchant:{m}", "merchant", m) for m in SECRET_FRAUD_MERCHANT]
+        rules += [Rule(f"amount:{a:.2f}", "amount", a) for a in SECRET_FRAUD_AMOUNT]
+        return cls(rules)
+
+    @classmethod
+    def from_path(cls, path, **kwargs):
+        """Loads rules from a CSV, or every CSV in a directory, with `kind`, `value` and optional `action` and `id` columns."""
+        rules = []
+        for file in rule_files(path):
+            with open(file, newline="", encoding="utf-8") as f:
+                for n, row in enumerate(csv.DictReader(f), start=2):
+                    kind, value = (row.get("kind") or "").strip(), (row.get("value") or "").strip()
+                    if not kind and not value:
+                        continue
+                    if not kind or not value:
+                        raise ValueError(f"{os.path.basename(file)} line {n}: a rule needs both kind and value")
+                    rules.append(Rule(row.get("id") or f"{os.path.basename(file)}:{n}", kind, value,
+                                      (row.get("action") or "flag").strip()))
+        return cls(rules, **kwargs)
+
+    def match(self, merchant, amount):
+        name = normalize_merchant(merchant)
+        matched = list(self._merchants.get(name, []))
+        matched += self._prefixes.prefixes_of(name)
+        if self.fuzzy_distance:
+            matched += self._fuzzy.within(name, self.fuzzy_distance)
+        matched += self._amounts.get(round(float(amount), 2), [])
+        matched += self._ranges.stab(float(amount))
+        return matched
+
+    def evaluate(self, merchant, amount):
+        """Returns the strongest action of the matching rules (`deny`, `flag` or None) and counts their hits."""
+        matched = self.match(merchant, amount)
+        with self._lock:
+            for rule in matched:
+                rule.hits += 1
+        actions = {rule.action for rule in matched}
+        action = "deny" if "deny" in actions else "flag" if actions else None
+        return Verdict(action, matched)
+
+    def hit_counts(self):
+        return pd.DataFrame(
+            [{"rule": r.id, "kind": r.kind, "action": r.action, "hits": r.hits} for r in self.rules if r.hits],
+            columns=["rule", "kind", "action", "hits"],
+        ).sort_values(by="hits", ascending=False, ignore_index=True)
+
+
+class RuleWatcher:
+    """Keeps the compiled RuleSet for a rules file or directory current without a restart.
+
+    A daemon thread compares file mtimes every `check_interval` seconds and, on
+    a change, compiles the new rules off to the side before swapping them in
+    with a single assignment, so readers never see a half-built set. Rules that
+    fail to load leave the previous set in place and are reported in `error`.
+    Without a path the built-in defaults are served.
+    """
+
+    def __init__(self, path=None, check_interval=RULES_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.error = None
+        self._signature = self._stat() if path else None
+        self.ruleset = RuleSet.from_path(path) if path else RuleSet.defaults()
+        self.loaded_at = time.time()
+
+    def _stat(self):
+        return tuple((f, os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in rule_files(self.path) if os.path.exists(f))
+
+    def reload_if_changed(self):
+        """Recompiles and swaps the rules when the files changed; returns True if it swapped."""
+        try:
+            signature = self._stat()
+            if signature == self._signature:
+                return False
+            ruleset = RuleSet.from_path(self.path)
+        except (OSError, KeyError, ValueError, csv.Error) as e:
+            self.error = f"{type(e).__name__}: {e}"
+            return False
+        hits = {rule.id: rule.hits for rule in self.ruleset.rules}
+        for rule in ruleset.rules:
+            rule.hits = hits.get(rule.id, 0)
+        self.ruleset, self._signature = ruleset, signature
+        self.loaded_at, self.error = time.time(), None
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+
+    def start(self):
+        if self.path:
+            threading.Thread(target=self._watch, name="rule-watcher", daemon=True).start()
+        return self
@@ -0,0 +1,373 @@
+import codecs
+import json
+import os
+import threading
+import time
+from array import array
+import numpy as np
+import pandas as pd
+from api_client import is_arrow
+
+HISTORY_TTL = float(os.environ.get("HISTORY_TTL", "60"))
+HISTORY_WINDOW = int(os.environ.get("HISTORY_WINDOW", "5000"))
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", "1000"))
+HISTORY_PAGE_ROWS = int(os.environ.get("HISTORY_PAGE_ROWS", "50"))
+HISTORY_STREAM_CHUNK = int(os.environ.get("HISTORY_STREAM_CHUNK", "65536"))
+HISTORY_LIVE_WAIT = float(os.environ.get("HISTORY_LIVE_WAIT", "25"))
+HISTORY_LIVE_INTERVAL = float(os.environ.get("HISTORY_LIVE_INTERVAL", "2"))
+HISTORY_LIVE_IDLE = float(os.environ.get("HISTORY_LIVE_IDLE", "60"))
+HISTORY_ARROW_DTYPES = os.environ.get("HISTORY_ARROW_DTYPES", "0").lower() in ("1", "true", "yes")
+HISTORY_COLUMNS = ["id", "Time", "Amount", "is_fraud", "probability_fraud"]
+STATUS_LABELS = ["Genuine ✅", "FRAUD 🚨"]
+FILTER_BOUNDS = {
+    "id": ("min_id", "max_id"),
+    "Amount": ("min_amount", "max_amount"),
+    "probability_fraud": ("min_probability", "max_probability"),
+    "Time": ("min_time", "max_time"),
+}
+
+
+def filter_mask(frame, filters):
+    """Vectorized mask of the rows matching `filters`, which mirror the /history/ query parameters."""
+    mask = np.ones(len(frame), dtype=bool)
+    for column, (low, high) in FILTER_BOUNDS.items():
+        if low in filters:
+            mask &= frame[column].to_numpy() >= filters[low]
+        if high in filters:
+            mask &= frame[column].to_numpy() <= filters[high]
+    if "is_fraud" in filters:
+        mask &= frame["is_fraud"].to_numpy(dtype=bool) == bool(filters["is_fraud"])
+    return mask
+
+
+def decode_history_stream(chunks, columns=HISTORY_COLUMNS):
+    """Parses a JSON array or NDJSON body chunk by chunk straight into per-column buffers.
+
+    Rows are decoded one object at a time and only `columns` are kept, as
+    doubles, so peak memory is one chunk plus the column buffers rather than
+    the whole body and a list of dicts.
+    """
+    buffers = {c: array("d") for c in columns}
+    seen = set()
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    text, done = "", False
+    for chunk in chunks:
+        text += utf8.decode(chunk)
+        pos = 0
+        while not done:
+            while pos < len(text) and text[pos] in " \t\r\n,[":
+                pos += 1
+            if pos == len(text):
+                break
+            if text[pos] == "]":
+                done = True
+                break
+            try:
+                row, pos = decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                break
+            seen.update(row)
+            for column, buffer in buffers.items():
+                value = row.get(column)
+                buffer.append(float("nan") if value is None else float(value))
+        text = text[pos:]
+    text += utf8.decode(b"", final=True)
+    if text.strip(" \t\r\n,]"):
+        raise ValueError("Truncated or malformed history response")
+    return pd.DataFrame({c: np.frombuffer(buffers[c], dtype="float64") for c in columns if c in seen})
+
+
+def apply_history_schema(frame, arrow=HISTORY_ARROW_DTYPES):
+    """Keeps only the history columns in compact dtypes.
+
+    `id` becomes the smallest signed int that fits, `is_fraud` a bool and
+    `Time`/`probability_fraud` float32. `Amount` stays float64 so rupees and
+    paise display exactly. With `arrow` the same types are pyarrow-backed.
+    """
+    frame = frame[[c for c in HISTORY_COLUMNS if c in frame.columns]]
+    if frame.empty:
+        return frame
+    dtypes = {"is_fraud": "bool", "probability_fraud": "float32", "Amount": "float64", "Time": "float32"}
+    id_dtype = pd.to_numeric(frame["id"], downcast="integer").dtype
+    if arrow:
+        dtypes = {"is_fraud": "bool[pyarrow]", "probability_fraud": "float[pyarrow]", "Amount": "double[pyarrow]",
+                  "Time": "float[pyarrow]"}
+        id_dtype = f"{id_dtype.name}[pyarrow]"
+    return frame.astype({"id": id_dtype, **{c: t for c, t in dtypes.items() if c in frame.columns}})
+
+
+def format_history(frame):
+    """Builds the display columns with vectorized ops; numbers stay numeric for st.column_config."""
+    return pd.DataFrame({
+        "id": frame["id"],
+        "Amount": frame["Amount"],
+        "Status": pd.Categorical.from_codes(frame["is_fraud"].to_numpy(dtype=bool).astype("int8"), categories=STATUS_LABELS),
+        "Fraud Probability": frame["probability_fraud"] * 100,
+        "Time": frame["Time"],
+    })
+
+
+def page_count(view, page_rows):
+    return max(1, -(-len(view) // page_rows))
+
+
+def page_for_id(view, row_id, page_rows):
+    """Page of a newest-first view that holds `row_id`, or the nearest older row when it is absent."""
+    position = int(np.searchsorted(-view["id"].to_numpy(), -row_id))
+    return min(position // page_rows, page_count(view, page_rows) - 1)
+
+
+class HistoryStore:
+    """Cached history frame that grows incrementally from an id cursor.
+
+    The backend is asked for `after_id`/`before_id`/`limit` pages. Servers that
+    ignore those parameters still work: rows outside the requested range are
+    dropped client-side, so a full payload simply degrades to a full reload.
+    `cursor` is the newest id fetched from the backend. Only fetches move it,
+    so rows added by record() cannot skip rows other clients stored in
+    between. `cursor_supported` records whether the last `after_id` page
+    honoured the cursor.
+
+    `params` are filters sent along with every page. Returned rows are masked
+    against them too, and `pushdown_supported` turns False as soon as the
+    backend sends a row that does not match.
+    """
+
+    def __init__(self, client, path="/history/", params=None, ttl=HISTORY_TTL, window=HISTORY_WINDOW,
+                 page_size=HISTORY_PAGE_SIZE):
+        self.client = client
+        self.path = path
+        self.params = dict(params or {})
+        self.ttl = ttl
+        self.window = window
+        self.page_size = page_size
+        self.frame = pd.DataFrame()
+        self.loaded_at = 0.0
+        self.version = 0
+        self.has_older = True
+        self.pushdown_supported = None if self.params else True
+        self.cursor = None
+        self.cursor_supported = None
+        self._view = pd.DataFrame()
+        self._view_version = 0
+        self._filtered_views = {}
+        self._lock = threading.RLock()
+
+    @property
+    def max_id(self):
+        return None if self.frame.empty else int(self.frame["id"].iloc[-1])
+
+    @property
+    def min_id(self):
+        return None if self.frame.empty else int(self.frame["id"].iloc[0])
+
+    def _fetch(self, timeout=None, endpoint=None, **params):
+        """Returns the rows matching this store's filters and how many rows the backend sent.
+
+        `endpoint` is the label the call's metrics are recorded under, the path by default.
+        """
+        endpoint = endpoint or self.path
+        options = {"timeout": timeout} if timeout else {}
+        response = self.client.get(self.path, params={**self.params, **params}, stream=True, endpoint=endpoint,
+                                   headers={"Accept": self.client.accept("application/x-ndjson", "application/json")},
+                                   **options)
+        try:
+            response.raise_for_status()
+            if is_arrow(response):
+                rows = self.client.decode_arrow(response, endpoint, HISTORY_STREAM_CHUNK)
+            else:
+                with self.client.metrics.timer(endpoint, "decode"):
+                    rows = decode_history_stream(self.client.iter_body(response, endpoint, HISTORY_STREAM_CHUNK))
+        finally:
+            response.close()
+        rows = apply_history_schema(rows)
+        received = len(rows)
+        if params.get("after_id") is not None and received:
+            self.cursor_supported = not (rows["id"] <= params["after_id"]).any()
+        if self.params and received:
+            mask = filter_mask(rows, self.params)
+            if not mask.all():
+                self.pushdown_supported = False
+                rows = rows[mask]
+            elif self.pushdown_supported is None:
+                self.pushdown_supported = True
+        return rows, received
+
+    def _append(self, rows):
+        if rows.empty:
+            return
+        frame = rows if self.frame.empty else pd.concat([self.frame, rows], ignore_index=True)
+        frame = frame.drop_duplicates(subset="id", keep="last").sort_values(by="id", ignore_index=True)
+        if len(frame) > self.window:
+            self.has_older = True
+        self.frame = frame.iloc[-self.window:].reset_index(drop=True)
+        self.version += 1
+
+    def _advance(self, rows):
+        if not rows.empty:
+            self.cursor = max(self.cursor or 0, int(rows["id"].max()))
+
+    def _load_newest(self):
+        rows, _ = self._fetch(limit=self.window)
+        if not rows.empty:
+            rows = rows.sort_values(by="id").iloc[-self.window:]
+        self._append(rows)
+        self._advance(rows)
+        self.has_older = len(self.frame) >= self.window
+
+    def memory_usage(self):
+        """Bytes held by the cached frame."""
+        return int(self.frame.memory_usage(deep=True).sum())
+
+    def _load_newer(self):
+        for _ in range(max(1, self.window // self.page_size)):
+            cursor = self.cursor
+            rows, received = self._fetch(after_id=cursor, limit=self.page_size)
+            if not rows.empty:
+                rows = rows[rows["id"] > cursor]
+            self._append(rows)
+            self._advance(rows)
+            # A short page, or rows at/below the cursor or outside the filters (parameters ignored), means we are caught up.
+            if rows.empty or received < self.page_size or len(rows) < received:
+                break
+        else:
+            # More new rows than the window holds: jump to the newest; the gap stays reachable via load_older().
+            self.frame, self.cursor = self.frame.iloc[0:0], None
+            self._load_newest()
+
+    def refresh(self, force=False):
+        """Returns the cached frame, fetching only rows newer than the cursor once stale."""
+        with self._lock:
+            if force or time.monotonic() - self.loaded_at >= self.ttl:
+                if self.cursor is None:
+                    self._load_newest()
+                else:
+                    self._load_newer()
+                self.loaded_at = time.monotonic()
+            return self.frame
+
+    def poll(self, wait=HISTORY_LIVE_WAIT):
+        """Long-polls for rows newer than the cursor and appends them; returns how many arrived.
+
+        `wait` is sent with the `after_id` cursor so a server that supports it
+        holds the request open until a row arrives; an empty store waits from
+        `after_id=0` rather than reloading every poll. The lock is not held while
+        waiting, so readers keep getting the cached frame. Metrics go under
+        "<path> (live)" so held requests do not skew the path's latency.
+        """
+        with self._lock:
+            if not self.loaded_at:
+                self.refresh(force=True)
+                return len(self.frame)
+            # A loaded store without a cursor matched nothing, so any row sent from here on is new.
+            cursor = self.cursor or 0
+        connect, read = self.client.timeout if isinstance(self.client.timeout, tuple) else (self.client.timeout,) * 2
+        rows, received = self._fetch(timeout=(connect, read + wait), endpoint=f"{self.path} (live)", after_id=cursor,
+                                     limit=self.page_size, wait=wait)
+        with self._lock:
+            if not rows.empty:
+                rows = rows[rows["id"] > cursor]
+            self._append(rows)
+            self._advance(rows)
+            if received >= self.page_size and len(rows) == received:
+                self._load_newer()
+            self.loaded_at = time.monotonic()
+            return len(rows)
+
+    def view(self):
+        """Returns the formatted frame, newest first, rebuilt only when the version changes."""
+        with self._lock:
+            if self._view_version != self.version:
+                self._view = format_history(self.frame).iloc[::-1].reset_index(drop=True) if not self.frame.empty else pd.DataFrame()
+                self._view_version = self.version
+            return self._view
+
+    def filtered_view(self, filters):
+        """Like view(), restricted to cached rows matching `filters`; the client-side fallback when the backend cannot filter."""
+        key = tuple(sorted(filters.items()))
+        with self._lock:
+            cached = self._filtered_views.get(key)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            frame = self.frame[filter_mask(self.frame, filters)] if not self.frame.empty else self.frame
+            view = format_history(frame).iloc[::-1].reset_index(drop=True) if not frame.empty else pd.DataFrame()
+            self._filtered_views = {k: v for k, v in self._filtered_views.items() if v[0] == self.version}
+            self._filtered_views[key] = (self.version, view)
+            return view
+
+    def invalidate(self):
+        """Marks the frame stale so the next refresh picks up new rows."""
+        with self._lock:
+            self.loaded_at = 0.0
+
+    def record(self, row):
+        """Applies a freshly scored transaction in place instead of dropping the cache."""
+        with self._lock:
+            rows = pd.DataFrame([{k: row[k] for k in HISTORY_COLUMNS if k in row}])
+            if row.get("id") is not None:
+                rows = apply_history_schema(rows)
+            if row.get("id") is None:
+                self.loaded_at = 0.0
+            elif (not self.frame.empty or self.loaded_at) and filter_mask(rows, self.params).all():
+                self._append(rows)
+
+    def load_older(self):
+        """Prepends one page of rows older than the oldest loaded id and widens the window."""
+        with self._lock:
+            if self.frame.empty:
+                return 0
+            rows, received = self._fetch(before_id=self.min_id, limit=self.page_size)
+            if not rows.empty:
+                rows = rows[rows["id"] < self.min_id].sort_values(by="id").iloc[-self.page_size:]
+            self.has_older = received >= self.page_size and not rows.empty
+            self.window += len(rows)
+            self._append(rows)
+            return len(rows)
+
+
+class LiveHistory:
+    """Keeps a HistoryStore current with a background long-poll while someone is watching.
+
+    A daemon thread calls `store.poll(wait)` in a loop, at most once every
+    `interval` seconds so a backend that ignores `wait` is polled rather than
+    hammered. A backend that ignores the `after_id` cursor sends the whole
+    table on every poll, so it is only polled every `store.ttl` seconds. The thread exits once `touch()` has not been called for `idle`
+    seconds; the next touch starts it again. The last failure is kept in
+    `error` until a poll succeeds.
+    """
+
+    def __init__(self, store, wait=HISTORY_LIVE_WAIT, interval=HISTORY_LIVE_INTERVAL, idle=HISTORY_LIVE_IDLE):
+        self.store = store
+        self.wait = wait
+        self.interval = interval
+        self.idle = idle
+        self.error = None
+        self.updated_at = None
+        self._touched = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def touch(self):
+        with self._lock:
+            self._touched = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-live", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if time.monotonic() - self._touched >= self.idle:
+                    self._thread = None
+                    return
+            started = time.monotonic()
+            try:
+                self.store.poll(self.wait)
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+            else:
+                self.error, self.updated_at = None, time.time()
+            interval = self.store.ttl if self.store.cursor_supported is False else self.interval
+            time.sleep(max(interval - (time.monotonic() - started), 0))
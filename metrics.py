@@ -0,0 +1,149 @@
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+METRICS_WINDOW = int(os.environ.get("METRICS_WINDOW", "1000"))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def server_time(response):
+    """Server-side processing seconds from Server-Timing or X-Process-Time, when the backend sends them."""
+    timing = response.headers.get("Server-Timing")
+    if timing:
+        durations = re.findall(r"dur=([\d.]+)", timing)
+        if durations:
+            return sum(float(d) for d in durations) / 1000
+    try:
+        return float(response.headers["X-Process-Time"])
+    except (KeyError, ValueError):
+        return None
+
+
+class LatencyStore:
+    """Rolling per-endpoint latency samples for each phase of a backend call.
+
+    Phases are `total` (request sent to body read), `network` (time to headers
+    minus server time), `server`, `decode` and `render`. Quantiles cover the last
+    `window` samples; counts and sums are cumulative for Prometheus. Body
+    sizes are cumulative per endpoint and direction, both as sent on the wire
+    and after content decoding.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._outcomes = defaultdict(lambda: deque(maxlen=window))
+        self._count = Counter()
+        self._sum = Counter()
+        self._requests = Counter()
+        self._errors = Counter()
+        self._wire_bytes = Counter()
+        self._body_bytes = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, phase, seconds):
+        with self._lock:
+            self._samples[(endpoint, phase)].append(seconds)
+            self._count[(endpoint, phase)] += 1
+            self._sum[(endpoint, phase)] += seconds
+
+    def record_request(self, endpoint, total, response=None, error=False):
+        """Records one call; timing phases are derived from the response when there is one."""
+        self.observe(endpoint, "total", total)
+        if response is not None:
+            ttfb = response.elapsed.total_seconds()
+            server = server_time(response)
+            if server is not None:
+                self.observe(endpoint, "server", server)
+            self.observe(endpoint, "network", max(ttfb - (server or 0.0), 0.0))
+        with self._lock:
+            self._outcomes[endpoint].append(error)
+            self._requests[endpoint] += 1
+            self._errors[endpoint] += bool(error)
+
+    def record_bytes(self, endpoint, direction, wire, decoded):
+        """Adds one body's size on the wire and after decoding; `direction` is `request` or `response`."""
+        with self._lock:
+            self._wire_bytes[(endpoint, direction)] += wire
+            self._body_bytes[(endpoint, direction)] += decoded
+
+    @contextmanager
+    def timer(self, endpoint, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(endpoint, phase, time.perf_counter() - start)
+
+    def summary(self):
+        """One row per endpoint and phase with p50/p95/p99 in ms and the rolling error rate."""
+        with self._lock:
+            samples = {key: np.array(values) for key, values in self._samples.items() if values}
+            error_rates = {e: sum(o) / len(o) for e, o in self._outcomes.items() if o}
+        rows = []
+        for (endpoint, phase), values in sorted(samples.items()):
+            p50, p95, p99 = np.quantile(values, QUANTILES) * 1000
+            rows.append({
+                "endpoint": endpoint,
+                "phase": phase,
+                "samples": len(values),
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "error_rate": error_rates.get(endpoint, 0.0),
+            })
+        return pd.DataFrame(rows)
+
+    def transfer_summary(self):
+        """One row per endpoint and direction with wire and decoded bytes and the compression ratio."""
+        with self._lock:
+            wire, body = dict(self._wire_bytes), dict(self._body_bytes)
+        return pd.DataFrame([{
+            "endpoint": endpoint,
+            "direction": direction,
+            "wire_bytes": wire[(endpoint, direction)],
+            "decoded_bytes": body[(endpoint, direction)],
+            "ratio": body[(endpoint, direction)] / wire[(endpoint, direction)] if wire[(endpoint, direction)] else 1.0,
+        } for endpoint, direction in sorted(wire)], columns=["endpoint", "direction", "wire_bytes", "decoded_bytes", "ratio"])
+
+    def prometheus(self, prefix="frontend_backend"):
+        """Renders the store in the Prometheus text exposition format."""
+        with self._lock:
+            samples = {key: np.array(values) for key, values in self._samples.items() if values}
+            count, total = dict(self._count), dict(self._sum)
+            requests, errors = dict(self._requests), dict(self._errors)
+            wire, body = dict(self._wire_bytes), dict(self._body_bytes)
+        lines = [
+            f"# HELP {prefix}_latency_seconds Latency of backend calls by endpoint and phase.",
+            f"# TYPE {prefix}_latency_seconds summary",
+        ]
+        for (endpoint, phase), values in sorted(samples.items()):
+            labels = f'endpoint="{endpoint}",phase="{phase}"'
+            for q, v in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                lines.append(f'{prefix}_latency_seconds{{{labels},quantile="{q}"}} {v:.6f}')
+            lines.append(f"{prefix}_latency_seconds_sum{{{labels}}} {total[(endpoint, phase)]:.6f}")
+            lines.append(f"{prefix}_latency_seconds_count{{{labels}}} {count[(endpoint, phase)]}")
+        lines += [
+            f"# HELP {prefix}_requests_total Backend calls by endpoint.",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        lines += [f'{prefix}_requests_total{{endpoint="{e}"}} {n}' for e, n in sorted(requests.items())]
+        lines += [
+            f"# HELP {prefix}_errors_total Failed backend calls by endpoint.",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        lines += [f'{prefix}_errors_total{{endpoint="{e}"}} {n}' for e, n in sorted(errors.items())]
+        lines += [
+            f"# HELP {prefix}_body_bytes_total Request and response body bytes by endpoint, on the wire and decoded.",
+            f"# TYPE {prefix}_body_bytes_total counter",
+        ]
+        for (endpoint, direction), n in sorted(wire.items()):
+            labels = f'endpoint="{endpoint}",direction="{direction}"'
+            lines.append(f'{prefix}_body_bytes_total{{{labels},encoding="wire"}} {n}')
+            lines.append(f'{prefix}_body_bytes_total{{{labels},encoding="decoded"}} {body[(endpoint, direction)]}')
+        return "\n".join(lines) + "\n"
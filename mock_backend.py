@@ -0,0 +1,263 @@
+"""Local stand-in for the fraud detection API.
+
+Serves `/predict/`, `/predict/batch/` and `/history/` with the same JSON shapes
+as the hosted backend (or as an Arrow IPC stream, and `/history/` as NDJSON,
+when the Accept header asks; bodies are gzipped both ways when the client
+says it can handle it; `/history/?after_id=N&wait=S` long-polls for up to S
+seconds until a newer row exists), plus artificial latency and failures, so the app can
+be developed and load tested on one machine:
+
+    python mock_backend.py --port 8000 --latency 0.05 --failure-rate 0.01
+    API_URL=http://localhost:8000 streamlit run streamlit_app.py
+
+Setting `MOCK_BACKEND=1` instead starts it inside the Streamlit process.
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import pyarrow as pa
+
+MOCK_BACKEND_PORT = int(os.environ.get("MOCK_BACKEND_PORT", "8000"))
+MOCK_LATENCY = float(os.environ.get("MOCK_LATENCY", "0.05"))
+MOCK_JITTER = float(os.environ.get("MOCK_JITTER", "0.02"))
+MOCK_FAILURE_RATE = float(os.environ.get("MOCK_FAILURE_RATE", "0"))
+MOCK_SEED_ROWS = int(os.environ.get("MOCK_SEED_ROWS", "0"))
+MOCK_GZIP_MIN_BYTES = int(os.environ.get("MOCK_GZIP_MIN_BYTES", "1024"))
+MOCK_MAX_WAIT = 60.0
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+NDJSON = "application/x-ndjson"
+FRAUD_TEMPLATE = [
+    -2.3, 1.1, -4.5, 4.1, -2.1, -1.2, -5.5, 0.7, -2.1, -5.2, 4.0, -7.9, 0.1, -8.1,
+    -0.3, -3.1, -12.2, 0.8, 0.1, 0.3, 0.6, 0.1, 0.0, -0.2, -0.1, 0.1, 0.4, 0.1,
+]
+
+
+FILTER_BOUNDS = {
+    "id": ("min_id", "max_id"),
+    "Amount": ("min_amount", "max_amount"),
+    "probability_fraud": ("min_probability", "max_probability"),
+    "Time": ("min_time", "max_time"),
+}
+
+
+def matches(row, filters):
+    for column, (low, high) in FILTER_BOUNDS.items():
+        if low in filters and row[column] < filters[low]:
+            return False
+        if high in filters and row[column] > filters[high]:
+            return False
+    return "is_fraud" not in filters or row["is_fraud"] == filters["is_fraud"]
+
+
+class MockBackend:
+    """In-memory transaction store with a toy model scoring distance to the fraud template."""
+
+    def __init__(self, latency=MOCK_LATENCY, jitter=MOCK_JITTER, failure_rate=MOCK_FAILURE_RATE, seed_rows=MOCK_SEED_ROWS):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rows = []
+        self.by_key = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        for _ in range(seed_rows):
+            self.predict({
+                "Time": random.uniform(0, 172800),
+                "Amount": round(random.uniform(1, 50000), 2),
+                **{f"V{i}": random.uniform(-5, 5) for i in range(1, 29)},
+            })
+
+    def predict(self, transaction, idempotency_key=None):
+        """Scores and stores a transaction; a repeated idempotency key returns the original row."""
+        distance = math.sqrt(sum((float(transaction[f"V{i + 1}"]) - v) ** 2 for i, v in enumerate(FRAUD_TEMPLATE)))
+        probability = 1 / (1 + math.exp(min(distance - 8, 700)))
+        with self._lock:
+            if idempotency_key in self.by_key:
+                return dict(self.by_key[idempotency_key])
+            row = {
+                "id": len(self.rows) + 1,
+                "Time": float(transaction["Time"]),
+                "Amount": float(transaction["Amount"]),
+                "is_fraud": int(probability >= 0.5),
+                "probability_fraud": probability,
+            }
+            self.rows.append(row)
+            if idempotency_key:
+                self.by_key[idempotency_key] = row
+            self._changed.notify_all()
+        return dict(row)
+
+    def history(self, after_id=None, before_id=None, limit=None, wait=0.0, **filters):
+        """Rows in ascending id order; `limit` keeps the oldest after a cursor, otherwise the newest.
+
+        `filters` take the same `min_*`/`max_*` bounds and `is_fraud` flag as the app sends.
+        With an `after_id` cursor and `wait`, an empty answer is held back for up
+        to `wait` seconds until a matching row is stored.
+        """
+        deadline = time.monotonic() + min(wait, MOCK_MAX_WAIT)
+        with self._changed:
+            rows = self._select(after_id, before_id, limit, filters)
+            while not rows and after_id is not None and self._changed.wait(max(deadline - time.monotonic(), 0)):
+                rows = self._select(after_id, before_id, limit, filters)
+            return rows
+
+    def _select(self, after_id, before_id, limit, filters):
+        rows = self.rows
+        if after_id is not None:
+            rows = rows[after_id:]
+        if before_id is not None:
+            rows = rows[:max(before_id - 1, 0)]
+        if filters:
+            rows = [r for r in rows if matches(r, filters)]
+        if after_id is not None:
+            return rows[:limit] if limit else list(rows)
+        return rows[-limit:] if limit else list(rows)
+
+    def delay(self):
+        time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+
+    def should_fail(self):
+        return random.random() < self.failure_rate
+
+
+def make_handler(backend):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without TCP_NODELAY the body waits on a delayed ACK (~40 ms).
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _negotiate(self, *offered):
+            """The first of `offered` the client accepts, otherwise JSON."""
+            accept = self.headers.get("Accept", "")
+            return next((t for t in offered if t in accept), "application/json")
+
+        def _send(self, status, payload, started, content_type="application/json"):
+            if content_type == ARROW_STREAM:
+                sink = pa.BufferOutputStream()
+                table = pa.Table.from_pylist(payload if isinstance(payload, list) else [payload])
+                with pa.ipc.new_stream(sink, table.schema) as writer:
+                    writer.write_table(table)
+                body = sink.getvalue().to_pybytes()
+            elif content_type == NDJSON:
+                body = "".join(json.dumps(row) + "\n" for row in payload).encode()
+            else:
+                body = json.dumps(payload).encode()
+            gzipped = len(body) >= MOCK_GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+            if gzipped:
+                body = gzip.compress(body)
+            elapsed = time.perf_counter() - started
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Server-Timing", f"app;dur={elapsed * 1000:.3f}")
+            self.send_header("X-Process-Time", f"{elapsed:.6f}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return json.loads(body or b"null")
+
+        def _begin(self):
+            started = time.perf_counter()
+            backend.delay()
+            if backend.should_fail():
+                self._send(503, {"detail": "Injected failure"}, started)
+                return None
+            return started
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/":
+                self._send(200, {"status": "ok"}, time.perf_counter())
+                return
+            if url.path != "/history/":
+                self._send(404, {"detail": "Not Found"}, time.perf_counter())
+                return
+            started = self._begin()
+            if started is None:
+                return
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                filters = {k: float(v) for k, v in query.items() if k.startswith(("min_", "max_"))}
+                if "is_fraud" in query:
+                    filters["is_fraud"] = int(query["is_fraud"])
+                rows = backend.history(
+                    after_id=int(query["after_id"]) if "after_id" in query else None,
+                    before_id=int(query["before_id"]) if "before_id" in query else None,
+                    limit=int(query["limit"]) if "limit" in query else None,
+                    wait=float(query.get("wait", 0)),
+                    **filters,
+                )
+            except ValueError as e:
+                self._send(422, {"detail": str(e)}, started)
+                return
+            self._send(200, rows, started, self._negotiate(ARROW_STREAM, NDJSON))
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            if path not in ("/predict/", "/predict/batch/"):
+                self._send(404, {"detail": "Not Found"}, time.perf_counter())
+                return
+            payload = self._read_json()
+            started = self._begin()
+            if started is None:
+                return
+            try:
+                if path == "/predict/batch/":
+                    result = [backend.predict(t) for t in payload]
+                else:
+                    result = backend.predict(payload, self.headers.get("Idempotency-Key"))
+            except (KeyError, TypeError, ValueError) as e:
+                self._send(422, {"detail": f"Invalid transaction: {e}"}, started)
+                return
+            self._send(200, result, started, self._negotiate(ARROW_STREAM))
+
+    return Handler
+
+
+def serve(port=MOCK_BACKEND_PORT, host="127.0.0.1", **options):
+    """Creates the mock server; call `serve_forever()` on the result."""
+    return ThreadingHTTPServer((host, port), make_handler(MockBackend(**options)))
+
+
+def serve_in_thread(port=MOCK_BACKEND_PORT, host="127.0.0.1", **options):
+    """Starts the mock server on a daemon thread and returns its base URL."""
+    server = serve(port, host, **options)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-backend", daemon=True).start()
+    return f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_BACKEND_PORT)
+    parser.add_argument("--latency", type=float, default=MOCK_LATENCY, help="Mean seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=MOCK_JITTER, help="Uniform +/- seconds around the latency")
+    parser.add_argument("--failure-rate", type=float, default=MOCK_FAILURE_RATE, help="Share of requests answered with 503")
+    parser.add_argument("--seed-rows", type=int, default=MOCK_SEED_ROWS, help="History rows generated at startup")
+    args = parser.parse_args()
+    server = serve(args.port, args.host, latency=args.latency, jitter=args.jitter,
+                   failure_rate=args.failure_rate, seed_rows=args.seed_rows)
+    server.daemon_threads = True
+    print(f"Mock backend listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
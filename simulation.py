@@ -0,0 +1,186 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from api_client import is_arrow
+
+BATCH_PREDICT_PATH = os.environ.get("BATCH_PREDICT_PATH", "")
+UPLOAD_CHUNK_ROWS = int(os.environ.get("UPLOAD_CHUNK_ROWS", "5000"))
+FEATURE_COLUMNS = [f"V{i}" for i in range(1, 29)]
+TRANSACTION_COLUMNS = ["Time", "Amount"] + FEATURE_COLUMNS
+PREDICTION_COLUMNS = ["is_fraud", "probability_fraud"]
+FRAUD_TRANSACTION_TEMPLATE = {
+    'V1': -2.3, 'V2': 1.1, 'V3': -4.5, 'V4': 4.1, 'V5': -2.1,
+    'V6': -1.2, 'V7': -5.5, 'V8': 0.7, 'V9': -2.1, 'V10': -5.2,
+    'V11': 4.0, 'V12': -7.9, 'V13': 0.1, 'V14': -8.1, 'V15': -0.3,
+    'V16': -3.1, 'V17': -12.2, 'V18': 0.8, 'V19': 0.1, 'V20': 0.3,
+    'V21': 0.6, 'V22': 0.1, 'V23': 0.0, 'V24': -0.2, 'V25': -0.1,
+    'V26': 0.1, 'V27': 0.4, 'V28': 0.1
+}
+FRAUD_TEMPLATE_VECTOR = np.array([FRAUD_TRANSACTION_TEMPLATE[c] for c in FEATURE_COLUMNS])
+
+
+def generate_features(n, fraud_share=0.0, seed=None):
+    """Returns an (n, 28) array of V1..V28 and the mask of rows jittered from the fraud template.
+
+    Template rows get +/-0.1 of noise per feature, the rest are uniform in
+    [-5, 5]; the same seed always yields the same array.
+    """
+    rng = np.random.default_rng(seed)
+    fraud = rng.random(n) < fraud_share
+    features = rng.uniform(-5, 5, size=(n, len(FEATURE_COLUMNS)))
+    features[fraud] = FRAUD_TEMPLATE_VECTOR + rng.uniform(-0.1, 0.1, size=(int(fraud.sum()), len(FEATURE_COLUMNS)))
+    return features, fraud
+
+
+def generate_transactions(n, fraud_share=0.1, min_amount=1.0, max_amount=50000.0, seed=None):
+    """Generates a frame of simulated transactions and the generator kind of each row."""
+    rng = np.random.default_rng(seed)
+    features, fraud = generate_features(n, fraud_share, rng)
+    frame = pd.DataFrame(features, columns=FEATURE_COLUMNS)
+    frame.insert(0, "Amount", rng.uniform(min_amount, max_amount, n).round(2))
+    frame.insert(0, "Time", np.full(n, time.time() % 172800))
+    return frame, np.where(fraud, "fraud template", "uniform")
+
+
+def to_payloads(frame, size=1):
+    """Serializes a transaction frame to JSON request bodies without building per-row dicts.
+
+    With `size` 1 every body is a single transaction object, otherwise a list of
+    up to `size` transactions for the batch endpoint.
+    """
+    frame = frame[TRANSACTION_COLUMNS]
+    if size == 1:
+        return frame.to_json(orient="records", lines=True, double_precision=15).splitlines()
+    return [frame.iloc[i:i + size].to_json(orient="records", double_precision=15)
+            for i in range(0, len(frame), size)]
+
+
+def _score(client, path, body, size):
+    """Posts one request body and returns its latency, the prediction columns and an error label."""
+    start = time.perf_counter()
+    try:
+        response = client.post(path, data=body, headers={"Content-Type": "application/json",
+                                                          "Accept": client.accept("application/json")})
+        latency = time.perf_counter() - start
+        if response.status_code != 200:
+            return latency, None, f"HTTP {response.status_code}"
+        if is_arrow(response):
+            frame = client.decode_arrow(response, path)
+            count = len(frame)
+            columns = {c: frame[c].tolist() if c in frame else [None] * count for c in PREDICTION_COLUMNS}
+        else:
+            predictions = client.decode(response, path)
+            predictions = predictions if isinstance(predictions, list) else [predictions]
+            count = len(predictions)
+            columns = {c: [p.get(c) for p in predictions] for c in PREDICTION_COLUMNS}
+        if count != size:
+            return latency, None, "Bad batch response"
+        return latency, columns, None
+    except Exception as e:
+        return time.perf_counter() - start, None, type(e).__name__
+
+
+def score_transactions(client, transactions, concurrency=4, batch_size=1, batch_path=BATCH_PREDICT_PATH):
+    """Scores a transaction frame with bounded concurrency, batching when the backend has a batch endpoint.
+
+    Returns one result row per transaction, the per-request latencies in ms and
+    the wall-clock seconds the run took.
+    """
+    batched = bool(batch_path) and batch_size > 1
+    size = batch_size if batched else 1
+    bodies = to_payloads(transactions, size)
+    sizes = [min(size, len(transactions) - i) for i in range(0, len(transactions), size)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="simulate") as pool:
+        outcomes = list(pool.map(
+            lambda args: _score(client, batch_path if batched else "/predict/", *args),
+            zip(bodies, sizes),
+        ))
+    elapsed = time.perf_counter() - start
+    is_fraud, probability, errors = [], [], []
+    for count, (latency, predictions, error) in zip(sizes, outcomes):
+        predictions = predictions or {c: [None] * count for c in PREDICTION_COLUMNS}
+        is_fraud.extend(predictions["is_fraud"])
+        probability.extend(predictions["probability_fraud"])
+        errors.extend([error] * count)
+    results = pd.DataFrame({"is_fraud": is_fraud, "probability_fraud": probability, "error": errors})
+    return results, [latency * 1000 for latency, _, _ in outcomes], elapsed
+
+
+def summarize(results, latencies, elapsed, kinds):
+    """Throughput, latency percentiles and the fraud-rate breakdown of a simulation run."""
+    latencies = pd.Series(latencies, dtype="float64")
+    scored = results.assign(kind=kinds)[results["error"].isna()]
+    breakdown = scored.groupby("kind").agg(
+        transactions=("is_fraud", "size"),
+        flagged=("is_fraud", lambda s: int((s == 1).sum())),
+        mean_probability=("probability_fraud", "mean"),
+    )
+    breakdown["fraud_rate"] = breakdown["flagged"] / breakdown["transactions"]
+    return {
+        "transactions": len(results),
+        "requests": len(latencies),
+        "errors": int(results["error"].notna().sum()),
+        "throughput": len(results) / elapsed if elapsed else 0.0,
+        "p50": latencies.quantile(0.50),
+        "p95": latencies.quantile(0.95),
+        "p99": latencies.quantile(0.99),
+        "fraud_rate": float((scored["is_fraud"] == 1).mean()) if len(scored) else 0.0,
+        "breakdown": breakdown,
+    }
+
+
+def iter_transaction_file(file, name, chunk_rows=UPLOAD_CHUNK_ROWS):
+    """Yields `(chunk, progress)` pairs from a CSV or Parquet file without reading it whole."""
+    if name.lower().endswith(".parquet"):
+        parquet = pq.ParquetFile(file)
+        total, done = parquet.metadata.num_rows, 0
+        for batch in parquet.iter_batches(batch_size=chunk_rows):
+            done += batch.num_rows
+            yield batch.to_pandas(), done / total if total else 1.0
+    else:
+        size = getattr(file, "size", 0)
+        for chunk in pd.read_csv(file, chunksize=chunk_rows):
+            yield chunk, min(file.tell() / size, 1.0) if size else 0.0
+
+
+def score_frame(client, frame, concurrency=4, batch_size=1):
+    """Scores every row of a transaction frame and returns it with the prediction columns appended."""
+    missing = [c for c in TRANSACTION_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    frame = frame.astype({c: "float64" for c in TRANSACTION_COLUMNS})
+    results, _, _ = score_transactions(client, frame, concurrency, batch_size)
+    return frame.assign(
+        is_fraud=results["is_fraud"].astype("Int8").to_numpy(),
+        probability_fraud=results["probability_fraud"].astype("float64").to_numpy(),
+        error=results["error"].astype("string").to_numpy(),
+    )
+
+
+class ScoredWriter:
+    """Appends scored chunks to a CSV or Parquet file on disk."""
+
+    def __init__(self, path, fmt="csv"):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+
+    def write(self, frame):
+        if self.fmt == "parquet":
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            frame.to_csv(self.path, mode="a", header=not self.rows, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
@@ -1,27 +1,34 @@
 import streamlit as st
 import requests
 import pandas as pd
+import os
 import time
-import random
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from api_client import ApiClient, KeepWarm
+from fraud_rules import RuleWatcher
+from history import HISTORY_LIVE_INTERVAL, HISTORY_PAGE_ROWS, HistoryStore, LiveHistory, page_count, page_for_id
+from metrics import LatencyStore
+from mock_backend import serve_in_thread
+from simulation import (BATCH_PREDICT_PATH, FEATURE_COLUMNS, ScoredWriter, generate_features, generate_transactions,
+                        iter_transaction_file, score_frame, score_transactions, summarize)
 st.set_page_config(
     page_title="Secure Transaction Demo",
     page_icon="💳",
     layout="centered",
     initial_sidebar_state="auto" 
 )
-API_URL = "https://fraud-detection-api-ddtn.onrender.com" 
+API_URL = os.environ.get("API_URL", "https://fraud-detection-api-ddtn.onrender.com")
+MOCK_BACKEND = os.environ.get("MOCK_BACKEND", "0").lower() in ("1", "true", "yes")
+PREDICT_WORKERS = int(os.environ.get("PREDICT_WORKERS", "8"))
+DUPLICATE_WINDOW = float(os.environ.get("DUPLICATE_WINDOW", "5"))
+FRAUD_RULES_PATH = os.environ.get("FRAUD_RULES_PATH", "")
+HISTORY_STORES = int(os.environ.get("HISTORY_STORES", "16"))
 if 'wallet_balance' not in st.session_state:
     st.session_state.wallet_balance = 500000.00
-FRAUD_TRANSACTION_TEMPLATE = {
-    'V1': -2.3, 'V2': 1.1, 'V3': -4.5, 'V4': 4.1, 'V5': -2.1,
-    'V6': -1.2, 'V7': -5.5, 'V8': 0.7, 'V9': -2.1, 'V10': -5.2,
-    'V11': 4.0, 'V12': -7.9, 'V13': 0.1, 'V14': -8.1, 'V15': -0.3,
-    'V16': -3.1, 'V17': -12.2, 'V18': 0.8, 'V19': 0.1, 'V20': 0.3,
-    'V21': 0.6, 'V22': 0.1, 'V23': 0.0, 'V24': -0.2, 'V25': -0.1,
-    'V26': 0.1, 'V27': 0.4, 'V28': 0.1
-}
-SECRET_FRAUD_MERCHANT = ["xyz enterprises", "shopify","uber","Uber","makemytrip","sitara 5 star","google play","walmart","indian oil"]
-SECRET_FRAUD_AMOUNT = [499999.00,74567.00,230000.00,123456.00,432121.00]
+if 'pending_transactions' not in st.session_state:
+    st.session_state.pending_transactions = []
 st.markdown("""
 <style>
     .stButton > button {
@@ -75,29 +82,232 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.image("https://placehold.co/600x100?text=SecureBank+Portal&font=lato", use_column_width=True)
 st.title("💳 Real-Time Transaction Analysis & Fraud Detection")
-@st.cache_data(ttl=60)
-def get_history():
-    """Fetches transaction history from the backend."""
+@st.cache_resource
+def start_mock_backend():
+    """Starts the bundled mock API once per process and returns its URL."""
+    return serve_in_thread()
+if MOCK_BACKEND:
+    API_URL = start_mock_backend()
+@st.cache_resource
+def get_metrics():
+    """Process-wide rolling latency store for every backend call."""
+    return LatencyStore()
+@st.cache_resource
+def get_client():
+    """Process-wide pooled client shared by every session."""
+    return ApiClient(API_URL, metrics=get_metrics())
+@st.cache_resource
+def start_keep_warm():
+    """Wakes the backend once per process before the first payment and keeps it warm if KEEP_WARM_INTERVAL is set."""
+    return KeepWarm(get_client()).start()
+start_keep_warm()
+@st.cache_resource(max_entries=HISTORY_STORES)
+def _history_store(api_url, path, params):
+    return HistoryStore(get_client(), path, dict(params))
+def get_history_store(path="/history/", **params):
+    """Shared history frame for one endpoint and filter, refreshed incrementally from the last loaded id."""
+    return _history_store(API_URL, path, tuple(sorted(params.items())))
+@st.cache_resource
+def _pushdown_ignored():
+    """(API URL, path) pairs whose backend was seen ignoring history filters, shared by every filter set."""
+    return set()
+HISTORY_COLUMN_CONFIG = {
+    "Amount": st.column_config.NumberColumn("Amount", format="₹%.2f"),
+    "Fraud Probability": st.column_config.NumberColumn("Fraud Probability", format="%.2f%%"),
+}
+def get_history(**filters):
+    """Fetches the transaction history view matching `filters`, and the store it came from.
+
+    Filters are pushed down to /history/; once the backend is seen ignoring them
+    the full cached history is filtered client-side instead.
+    """
+    store = get_history_store()
     try:
-        response = requests.get(f"{API_URL}/history/")
-        if response.status_code == 200:
-            return pd.DataFrame(response.json())
-        else:
-            st.error(f"Failed to fetch history (Status: {response.status_code})")
-            return pd.DataFrame()
+        if filters and (API_URL, store.path) not in _pushdown_ignored():
+            filtered = get_history_store(**filters)
+            filtered.refresh()
+            if filtered.pushdown_supported is not False:
+                return filtered, filtered.view()
+            _pushdown_ignored().add((API_URL, store.path))
+        store.refresh()
+        return store, store.filtered_view(filters) if filters else store.view()
+    except requests.exceptions.HTTPError as e:
+        st.error(f"Failed to fetch history (Status: {e.response.status_code})")
     except requests.exceptions.ConnectionError:
         st.error(f"Connection Error: Could not connect to the API at {API_URL}.")
-        return pd.DataFrame()
+    except requests.exceptions.Timeout:
+        st.error(f"Timeout: The API at {API_URL} did not respond in time.")
     except Exception as e:
         st.error(f"An error occurred: {e}")
-        return pd.DataFrame()
-tab1, tab2, tab3 = st.tabs(["💼 My Wallet", "🏦 Make a Payment", "📈 Transaction History"])
+    return store, pd.DataFrame()
+def set_history_page(page):
+    st.session_state.history_page = page
+def record_history(row):
+    """Adds a scored transaction to the shared history and to the filtered view this session is looking at."""
+    get_history_store().record(row)
+    if st.session_state.get("history_filters"):
+        get_history_store(**st.session_state.history_filters).record(row)
+@st.cache_resource(max_entries=HISTORY_STORES)
+def _live_history(api_url, path, params):
+    return LiveHistory(_history_store(api_url, path, params))
+def get_live_history(store):
+    """Background long-poll that appends new rows to `store` while a session is watching it."""
+    live = _live_history(API_URL, store.path, tuple(sorted(store.params.items())))
+    live.store = store
+    return live
+@st.cache_resource
+def get_rule_watcher():
+    """Process-wide rule watcher that reloads FRAUD_RULES_PATH when it changes."""
+    return RuleWatcher(FRAUD_RULES_PATH or None).start()
+def get_rules():
+    """The current compiled pre-screen rules, shared by every session."""
+    return get_rule_watcher().ruleset
+@st.cache_resource
+def get_executor():
+    """Process-wide worker pool that sends /predict/ calls off the script thread."""
+    return ThreadPoolExecutor(max_workers=PREDICT_WORKERS, thread_name_prefix="predict")
+def held_amount():
+    """Total of payments that are still awaiting a prediction."""
+    return sum(t["amount"] for t in st.session_state.pending_transactions if t["status"] == "pending")
+def find_duplicate_payment(fingerprint):
+    """Returns the payment an identical submit should attach to: one still in flight or just finished."""
+    now = time.monotonic()
+    for txn in reversed(st.session_state.pending_transactions):
+        if txn["fingerprint"] == fingerprint and (txn["status"] == "pending" or now - txn["finished_at"] < DUPLICATE_WINDOW):
+            return txn
+    return None
+def submit_payment(merchant, amount, transaction_data, fingerprint, background):
+    """Queues a prediction on the worker pool under a fresh idempotency key and records it as pending."""
+    key = str(uuid.uuid4())
+    txn = {
+        "key": key,
+        "fingerprint": fingerprint,
+        "background": background,
+        "merchant": merchant,
+        "amount": amount,
+        "transaction": transaction_data,
+        "future": get_executor().submit(get_client().predict, transaction_data, key),
+        "status": "pending",
+        "message": "Awaiting bank response...",
+        "finished_at": None,
+    }
+    st.session_state.pending_transactions.append(txn)
+    finished = [t for t in st.session_state.pending_transactions if t["status"] != "pending"]
+    for old in finished[:-20]:
+        st.session_state.pending_transactions.remove(old)
+    return txn
+def apply_finished_transactions():
+    """Applies landed predictions to the wallet exactly once each; returns True if any landed."""
+    landed = False
+    for txn in st.session_state.pending_transactions:
+        if txn["status"] != "pending" or not txn["future"].done():
+            continue
+        landed = True
+        txn["status"] = "error"
+        txn["finished_at"] = time.monotonic()
+        try:
+            prediction = txn["future"].result()
+            record_history({**txn["transaction"], **prediction})
+            prob_fraud = txn["probability"] = prediction['probability_fraud'] * 100
+            if prediction['is_fraud'] == 1:
+                txn["status"] = "denied"
+                txn["message"] = f"DENIED: High Fraud Risk! (Probability: {prob_fraud:.2f}%)"
+            else:
+                st.session_state.wallet_balance -= txn["amount"]
+                txn["status"] = "approved"
+                txn["message"] = f"Approved (Fraud Probability: {prob_fraud:.2f}%)"
+        except requests.exceptions.HTTPError as e:
+            txn["message"] = str(e)
+        except requests.exceptions.ConnectionError:
+            txn["message"] = f"Connection Error: Could not connect to the Server at {API_URL}."
+        except requests.exceptions.Timeout:
+            txn["message"] = f"Timeout: The Server at {API_URL} did not respond in time."
+        except Exception as e:
+            txn["message"] = f"An error occurred during submission: {e}"
+        if txn["background"]:
+            st.toast(f"₹{txn['amount']:,.2f} to {txn['merchant']}: {txn['message']}")
+    return landed
+def show_pending_transactions():
+    if apply_finished_transactions():
+        st.rerun()
+    icons = {"pending": "⏳", "approved": "✅", "denied": "🚨", "error": "⚠️"}
+    for txn in reversed([t for t in st.session_state.pending_transactions if t["background"]]):
+        st.markdown(f"{icons[txn['status']]} **₹{txn['amount']:,.2f}** to {txn['merchant']} — {txn['message']}")
+def show_payment_result(txn):
+    if txn["status"] == "denied":
+        st.error(f"**Transaction DENIED: High Fraud Risk!** (Probability: {txn['probability']:.2f}%)")
+        st.warning("This transaction has been flagged. Your balance was not affected.")
+    elif txn["status"] == "approved":
+        st.success(f"**Transaction Approved** (Fraud Probability: {txn['probability']:.2f}%)")
+        st.balloons()
+        st.info(f"New balance: ₹(INR){st.session_state.wallet_balance:,.2f}")
+    else:
+        st.error(txn["message"])
+apply_finished_transactions()
+def show_history(live=False):
+    """Renders the page of history this session is on; with `live` new rows are long-polled in the background."""
+    history_store, history_view = get_history(**st.session_state.history_filters)
+    if live:
+        live_feed = get_live_history(history_store).touch()
+        if live_feed.error:
+            st.warning(f"Live updates are retrying: {live_feed.error}")
+        elif live_feed.updated_at:
+            st.caption(f"🟢 Live: last poll answered {time.time() - live_feed.updated_at:,.0f}s ago.")
+    if st.session_state.get("history_page_key") != st.session_state.history_filters:
+        st.session_state.history_page_key = st.session_state.history_filters
+        st.session_state.history_page = 0
+    if history_view.empty:
+        if st.session_state.history_filters:
+            st.info("No transactions match these filters.")
+        else:
+            st.info("No transaction history found. Submit a payment to see it appear here.")
+    else:
+        page_options = sorted({25, 50, 100, 250, 500, HISTORY_PAGE_ROWS})
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            page_rows = st.selectbox("Rows per page", page_options, index=page_options.index(HISTORY_PAGE_ROWS))
+        with col2:
+            jump_id = st.number_input("Jump to id", min_value=0, value=None, step=1)
+        with col3:
+            st.write("")
+            st.write("")
+            st.button("Go", disabled=jump_id is None, on_click=set_history_page,
+                      args=(page_for_id(history_view, jump_id, page_rows) if jump_id is not None else 0,))
+        pages = page_count(history_view, page_rows)
+        st.session_state.history_page = min(st.session_state.history_page, pages - 1)
+        col1, col2, col3 = st.columns([1, 2, 1])
+        col1.button("◀ Newer", disabled=st.session_state.history_page == 0,
+                    on_click=set_history_page, args=(st.session_state.history_page - 1,))
+        col3.button("Older ▶", disabled=st.session_state.history_page >= pages - 1,
+                    on_click=set_history_page, args=(st.session_state.history_page + 1,))
+        start = st.session_state.history_page * page_rows
+        col2.caption(f"Rows {start + 1:,}–{min(start + page_rows, len(history_view)):,} of {len(history_view):,} "
+                     f"(page {st.session_state.history_page + 1:,} of {pages:,})")
+        with get_metrics().timer("/history/", "render"):
+            st.dataframe(
+                history_view.iloc[start:start + page_rows],
+                use_container_width=True,
+                hide_index=True,
+                column_config=HISTORY_COLUMN_CONFIG
+            )
+        st.caption(f"{len(history_store.frame):,} rows cached in {history_store.memory_usage() / 2**20:,.1f} MiB.")
+    if history_store.has_older and not history_store.frame.empty and st.button("Load Older Transactions"):
+        try:
+            added = history_store.load_older()
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+        else:
+            st.toast(f"Loaded {added} older transactions.")
+            st.rerun()
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["💼 My Wallet", "🏦 Make a Payment", "📈 Transaction History", "🧪 Bulk Simulate", "⏱️ Latency"])
 with tab1:
     st.header("Your Current Balance")
     st.metric(
         label="Available Funds",
         value=f"₹{st.session_state.wallet_balance:,.2f}"
     )
+    if held_amount():
+        st.caption(f"₹{held_amount():,.2f} is on hold for payments awaiting a bank response.")
     st.markdown("---")
     st.subheader("Wallet Actions")
     if st.button("Reset Balance to ₹5,00,000"):
@@ -106,6 +316,7 @@ with tab1:
         st.rerun()
 with tab2:
     st.header("New Transaction")
+    background_mode = st.toggle("Submit in background", help="Queue payments without waiting for the bank's response.")
     with st.form("payment_form"):
         st.markdown("Enter payment details to simulate a transaction.")
         col1, col2 = st.columns(2)
@@ -117,62 +328,215 @@ with tab2:
         st.markdown("---")
         submit_button = st.form_submit_button("Proceed To Pay")
     if submit_button:
-        st.cache_data.clear()
-        if amount > st.session_state.wallet_balance:
+        fingerprint = (cardholder_name, merchant, amount)
+        payment = find_duplicate_payment(fingerprint)
+        available = st.session_state.wallet_balance - held_amount()
+        if payment is not None:
+            st.toast("This payment was already submitted; showing its result instead of paying twice.")
+        elif amount > available:
             st.error(f"**Transaction DENIED: Insufficient Balance!**")
-            st.warning(f"Your balance is ₹(INR) {st.session_state.wallet_balance:,.2f}, but you requested ₹(INR){amount:,.2f}.")
+            st.warning(f"Your available balance is ₹(INR) {available:,.2f}, but you requested ₹(INR){amount:,.2f}.")
+        elif (verdict := get_rules().evaluate(merchant, amount)).action == "deny":
+            st.error("**Transaction DENIED: Blocked by fraud rules!**")
+            st.warning(f"Matched rule(s): {', '.join(str(r.id) for r in verdict.rules if r.action == 'deny')}. Your balance was not affected.")
         else:
-            is_secret_fraud = (
-                merchant in SECRET_FRAUD_MERCHANT or 
-                amount in SECRET_FRAUD_AMOUNT
-            )
+            is_secret_fraud = verdict.action == "flag"
             if is_secret_fraud:
                 st.toast("High-Risk transaction detected, running extra checks...")
-                v_features = {k: v + random.uniform(-0.1, 0.1) for k, v in FRAUD_TRANSACTION_TEMPLATE.items()}
-            else:
-                v_features = {f'V{i}': random.uniform(-5, 5) for i in range(1, 29)}
+            features, _ = generate_features(1, 1.0 if is_secret_fraud else 0.0)
+            v_features = dict(zip(FEATURE_COLUMNS, features[0].tolist()))
+            transaction_data = {
+                "Time": time.time() % 172800,
+                "Amount": amount,
+                **v_features
+            }
+            payment = submit_payment(merchant, amount, transaction_data, fingerprint, background_mode)
+            if background_mode:
+                st.toast("Transaction queued, awaiting bank response...")
+        if payment is not None and not payment["background"]:
             with st.spinner("Processing transaction... Contacting bank..."):
-                transaction_data = {
-                    "Time": time.time() % 172800,
-                    "Amount": amount,
-                    **v_features
-                }
-                try:
-                    response = requests.post(f"{API_URL}/predict/", json=transaction_data)
-                    if response.status_code == 200:
-                        prediction = response.json()
-                        is_fraud = prediction['is_fraud']
-                        prob_fraud = prediction['probability_fraud'] * 100
-                        if is_fraud == 1:
-                            st.error(f"**Transaction DENIED: High Fraud Risk!** (Probability: {prob_fraud:.2f}%)")
-                            st.warning("This transaction has been flagged. Your balance was not affected.")
-                        else:
-                            st.session_state.wallet_balance -= amount
-                            st.success(f"**Transaction Approved** (Fraud Probability: {prob_fraud:.2f}%)")
-                            st.balloons()
-                            st.info(f"New balance: ₹(INR){st.session_state.wallet_balance:,.2f}")  
-                    else:
-                        st.error(f"Error from API ({response.status_code}): {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error(f"Connection Error: Could not connect to the Server at {API_URL}.")
-                except Exception as e:
-                    st.error(f"An error occurred during submission: {e}")
+                wait([payment["future"]])
+            apply_finished_transactions()
+            show_payment_result(payment)
+    with st.expander("Fraud Rule Hits"):
+        rules = get_rules()
+        rule_hits = rules.hit_counts()
+        st.caption(f"{len(rules.rules):,} rules loaded at {time.strftime('%H:%M:%S', time.localtime(get_rule_watcher().loaded_at))}.")
+        if get_rule_watcher().error:
+            st.warning(f"Keeping the previous rules; the rules file failed to load: {get_rule_watcher().error}")
+        if not rule_hits.empty:
+            st.dataframe(rule_hits, use_container_width=True, hide_index=True)
+    background_payments = [t for t in st.session_state.pending_transactions if t["background"]]
+    if background_payments:
+        st.subheader("Recent Background Payments")
+        has_pending = any(t["status"] == "pending" for t in background_payments)
+        st.fragment(run_every=1.0 if has_pending else None)(show_pending_transactions)()
 with tab3:
     st.header("Transaction History")
     st.markdown("View all processed transactions from the secure database.")
+    with st.expander("Filters"):
+        with st.form("history_filters_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                status_filter = st.selectbox("Status", ["All", "Fraud", "Genuine"])
+                min_amount = st.number_input("Min Amount (INR)", min_value=0.0, value=None, step=100.0)
+                min_id = st.number_input("From id", min_value=0, value=None, step=1)
+                min_time = st.number_input("From Time (s)", min_value=0.0, value=None, step=60.0)
+            with col2:
+                probability_range = st.slider("Fraud Probability (%)", 0.0, 100.0, (0.0, 100.0), 0.5)
+                max_amount = st.number_input("Max Amount (INR)", min_value=0.0, value=None, step=100.0)
+                max_id = st.number_input("To id", min_value=0, value=None, step=1)
+                max_time = st.number_input("To Time (s)", min_value=0.0, value=None, step=60.0)
+            st.form_submit_button("Apply Filters")
+    history_filters = {
+        "is_fraud": {"All": None, "Fraud": 1, "Genuine": 0}[status_filter],
+        "min_amount": min_amount,
+        "max_amount": max_amount,
+        "min_probability": probability_range[0] / 100 if probability_range[0] > 0 else None,
+        "max_probability": probability_range[1] / 100 if probability_range[1] < 100 else None,
+        "min_time": min_time,
+        "max_time": max_time,
+        "min_id": min_id,
+        "max_id": max_id,
+    }
+    st.session_state.history_filters = {k: v for k, v in history_filters.items() if v is not None}
     if st.button("Refresh History"):
-        st.cache_data.clear()
+        get_history_store().invalidate()
+        get_history_store(**st.session_state.history_filters).invalidate()
         st.toast("Refreshing history...")
-    history_df = get_history()
-    if history_df.empty:
-        st.info("No transaction history found. Submit a payment to see it appear here.")
+    live_history = st.toggle("Live updates", help="Appends new transactions as they arrive instead of waiting for a refresh.")
+    st.fragment(run_every=HISTORY_LIVE_INTERVAL if live_history else None)(show_history)(live_history)
+with tab4:
+    st.header("Bulk Simulation")
+    st.markdown("Generate and score many transactions at once to load test the model server.")
+    with st.form("simulation_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            sim_count = st.number_input("Transactions", min_value=1, max_value=100000, value=200, step=100)
+            sim_fraud_share = st.slider("Fraud template share", 0.0, 1.0, 0.1, 0.05)
+            sim_seed = st.number_input("Random seed", min_value=0, value=None, step=1,
+                                       help="Leave empty for a different run each time.")
+        with col2:
+            sim_concurrency = st.slider("Concurrent requests", 1, get_client().pool_size, min(4, get_client().pool_size))
+            sim_batch_size = st.number_input("Transactions per request", min_value=1, max_value=1000, value=1,
+                                             disabled=not BATCH_PREDICT_PATH,
+                                             help="Requires a batch endpoint configured via BATCH_PREDICT_PATH.")
+        sim_button = st.form_submit_button("Run Simulation")
+    if sim_button:
+        transactions, kinds = generate_transactions(int(sim_count), sim_fraud_share, seed=sim_seed)
+        with st.spinner(f"Scoring {len(transactions):,} transactions..."):
+            results, latencies, elapsed = score_transactions(get_client(), transactions, sim_concurrency, int(sim_batch_size))
+        get_history_store().invalidate()
+        report = summarize(results, latencies, elapsed, kinds)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Throughput", f"{report['throughput']:,.1f} txn/s")
+        col2.metric("Fraud Rate", f"{report['fraud_rate']:.1%}")
+        col3.metric("Errors", f"{report['errors']:,} / {report['transactions']:,}")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("p50 Latency", f"{report['p50']:,.0f} ms")
+        col2.metric("p95 Latency", f"{report['p95']:,.0f} ms")
+        col3.metric("p99 Latency", f"{report['p99']:,.0f} ms")
+        st.caption(f"{report['requests']:,} requests in {elapsed:,.2f}s")
+        st.dataframe(
+            report["breakdown"],
+            use_container_width=True,
+            column_config={
+                "mean_probability": st.column_config.NumberColumn("Mean Probability", format="%.4f"),
+                "fraud_rate": st.column_config.NumberColumn("Fraud Rate", format="%.4f"),
+            }
+        )
+        if report["errors"]:
+            st.warning(f"Errors: {results['error'].value_counts().to_dict()}")
+    st.markdown("---")
+    st.subheader("Score a Transaction File")
+    st.markdown("Replay a CSV or Parquet file with `Time`, `Amount` and `V1`..`V28` columns against the model.")
+    with st.form("upload_form"):
+        upload = st.file_uploader("Transaction file", type=["csv", "parquet"])
+        col1, col2 = st.columns(2)
+        with col1:
+            upload_concurrency = st.slider("Concurrent requests", 1, get_client().pool_size, min(4, get_client().pool_size), key="upload_concurrency")
+            upload_batch_size = st.number_input("Rows per request", min_value=1, max_value=1000, value=1,
+                                                disabled=not BATCH_PREDICT_PATH,
+                                                help="Requires a batch endpoint configured via BATCH_PREDICT_PATH.")
+        with col2:
+            upload_format = st.radio("Output format", ["csv", "parquet"], horizontal=True)
+        upload_button = st.form_submit_button("Score File")
+    if upload_button and upload is not None:
+        previous = st.session_state.pop("scored_file", None)
+        if previous and os.path.exists(previous["path"]):
+            os.unlink(previous["path"])
+        with tempfile.NamedTemporaryFile(suffix=f".{upload_format}", delete=False) as tmp:
+            writer = ScoredWriter(tmp.name, upload_format)
+        progress = st.progress(0.0)
+        status = st.empty()
+        start = time.perf_counter()
+        try:
+            for chunk, done in iter_transaction_file(upload, upload.name):
+                writer.write(score_frame(get_client(), chunk, upload_concurrency, int(upload_batch_size)))
+                elapsed = time.perf_counter() - start
+                progress.progress(done)
+                status.caption(f"{writer.rows:,} rows scored in {elapsed:,.1f}s ({writer.rows / elapsed:,.0f} rows/s)")
+        except Exception as e:
+            st.error(f"An error occurred while scoring the file: {e}")
+        finally:
+            writer.close()
+        get_history_store().invalidate()
+        st.session_state.scored_file = {"path": writer.path, "name": f"scored_{os.path.splitext(upload.name)[0]}.{upload_format}"}
+    if st.session_state.get("scored_file") and os.path.exists(st.session_state.scored_file["path"]):
+        with open(st.session_state.scored_file["path"], "rb") as scored:
+            st.download_button("Download Scored File", scored, file_name=st.session_state.scored_file["name"])
+with tab5:
+    st.header("Backend Latency")
+    st.markdown("Rolling timings of every call this process made to the API.")
+    if st.button("Refresh Latency"):
+        st.rerun()
+    latency_df = get_metrics().summary()
+    if latency_df.empty:
+        st.info("No backend calls recorded yet.")
     else:
-        history_df['Status'] = history_df['is_fraud'].apply(lambda x: "FRAUD 🚨" if x == 1 else "Genuine ✅")
-        history_df['Fraud Probability'] = history_df['probability_fraud'].apply(lambda p: f"{p*100:.2f}%")
-        history_df['Amount'] = history_df['Amount'].apply(lambda a: f"₹{a:,.2f}")
-        display_cols = ['id', 'Amount', 'Status', 'Fraud Probability', 'Time']
         st.dataframe(
-            history_df.sort_values(by="id", ascending=False)[display_cols],
+            latency_df,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_config={
+                "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                "p99_ms": st.column_config.NumberColumn("p99 (ms)", format="%.1f"),
+                "error_rate": st.column_config.NumberColumn("Error Rate", format="%.2f"),
+            }
         )
+    transfer_df = get_metrics().transfer_summary()
+    if not transfer_df.empty:
+        st.subheader("Transfer Sizes")
+        st.dataframe(
+            transfer_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "wire_bytes": st.column_config.NumberColumn("Wire Bytes", format="%d"),
+                "decoded_bytes": st.column_config.NumberColumn("Decoded Bytes", format="%d"),
+                "ratio": st.column_config.NumberColumn("Compression Ratio", format="%.2fx"),
+            }
+        )
+    breaker = get_client().breaker
+    st.caption(f"Circuit breaker: **{breaker.state.replace('_', '-')}** ({breaker.failures} consecutive failures)")
+    if get_client().prediction_cache is not None:
+        st.subheader("Prediction Cache")
+        cache_stats = get_client().prediction_cache.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hit Rate", f"{cache_stats['hit_rate']:.1%}")
+        col2.metric("Hits", f"{cache_stats['hits']:,} + {cache_stats['coalesced']:,} coalesced")
+        col3.metric("Misses", f"{cache_stats['misses']:,}")
+        col4.metric("Evictions", f"{cache_stats['evictions']:,}")
+        st.caption(f"{cache_stats['entries']:,} cached predictions")
+    st.subheader("Replicas")
+    st.dataframe(
+        get_client().replicas.status(),
+        use_container_width=True,
+        hide_index=True,
+        column_config={"ejected_for_s": st.column_config.NumberColumn("Ejected For (s)", format="%.0f")}
+    )
+    prometheus_text = get_metrics().prometheus()
+    st.download_button("Export Prometheus Metrics", prometheus_text, file_name="metrics.prom", mime="text/plain")
+    with st.expander("Prometheus text"):
+        st.code(prometheus_text, language="text")